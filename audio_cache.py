@@ -0,0 +1,86 @@
+import argparse
+import hashlib
+import os
+import subprocess
+
+import numpy as np
+
+from paths import AUDIO_FOLDER
+
+SAMPLE_RATE = 16000
+CACHE_FOLDER = os.path.join(os.path.expanduser("~"), ".cache", "mres_audio")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".mp4", ".webm")
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_content_hash(filepath):
+    """Returns the SHA-256 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def decode_audio(filepath, sample_rate=SAMPLE_RATE):
+    """
+    Decodes any ffmpeg-readable file to mono float32 PCM at `sample_rate`,
+    using the same ffmpeg settings as whisper.load_audio.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", filepath,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode {filepath}: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def cache_path_for(filepath, cache_folder=CACHE_FOLDER, sample_rate=SAMPLE_RATE):
+    """Cache entries are keyed by source content and resample settings, not by file name."""
+    return os.path.join(cache_folder, f"{file_content_hash(filepath)}_{sample_rate}hz_mono_f32.npy")
+
+
+def load_cached_audio(filepath, cache_folder=CACHE_FOLDER, sample_rate=SAMPLE_RATE):
+    """
+    Loads a recording as 16 kHz mono float32, decoding it through ffmpeg only the
+    first time. The array is memory-mapped read-only, so several workers reading
+    the same session share the decoded pages instead of holding private copies.
+    """
+    cached = cache_path_for(filepath, cache_folder, sample_rate)
+    if not os.path.exists(cached):
+        os.makedirs(cache_folder, exist_ok=True)
+        audio = decode_audio(filepath, sample_rate)
+        # Write to a temporary name first so concurrent runs never see a partial file
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, audio)
+        os.replace(tmp_path, cached)
+    return np.load(cached, mmap_mode="r")
+
+
+def warm_cache(audio_folder, cache_folder=CACHE_FOLDER, sample_rate=SAMPLE_RATE):
+    """Decodes every recording in a folder into the cache ahead of a batch run."""
+    count = 0
+    for filename in sorted(os.listdir(audio_folder)):
+        if not filename.lower().endswith(AUDIO_EXTENSIONS):
+            continue
+        audio = load_cached_audio(os.path.join(audio_folder, filename), cache_folder, sample_rate)
+        print(f"Cached {filename}: {len(audio) / sample_rate:.1f} s")
+        count += 1
+    print(f"Total files cached: {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-decode session recordings into the audio cache.")
+    parser.add_argument("audio_folder", nargs="?", default=AUDIO_FOLDER, help="Folder of session recordings.")
+    parser.add_argument("--cache_folder", default=CACHE_FOLDER, help="Where decoded .npy files are kept.")
+    parser.add_argument("--sample_rate", default=SAMPLE_RATE, help="Resample rate in Hz.", type=int)
+    args = parser.parse_args(argv)
+    warm_cache(args.audio_folder, args.cache_folder, args.sample_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,8 @@ from collections import defaultdict
 # CLEANED_TRANSCRIPT_FILE = "/mnt/c/Documents and Settings/olutu/Downloads/cleaned_transcriptions/TUEPM30.txt"
 # OUTPUT_COMPARISON_FILE = "/mnt/c/Documents and Settings/olutu/Downloads/wer_processing_transcriptions/TUEPM30_Comparison.txt"
 
-WHISPER_FOLDER = "/mnt/c/Documents and Settings/olutu/Downloads/whisper_transcriptions/"
-CLEANED_FOLDER = "/mnt/c/Documents and Settings/olutu/Downloads/cleaned_transcriptions/"
-OUTPUT_FOLDER = "/mnt/c/Documents and Settings/olutu/Downloads/wer_processing_transcriptions/"
+from paths import CLEANED_FOLDER, WHISPER_FOLDER
+from paths import WER_FOLDER as OUTPUT_FOLDER
 
 
 def normalize_event_label(event_label):
@@ -74,9 +73,9 @@ def natural_event_sort_key(event_label):
         return (1, event_label)
     return (2, event_label)
 
-def batch_process_files():
+def batch_process_files(whisper_folder=WHISPER_FOLDER, cleaned_folder=CLEANED_FOLDER, output_folder=OUTPUT_FOLDER):
     count=0
-    whisper_files = [f for f in os.listdir(WHISPER_FOLDER) if f.endswith(".txt")]
+    whisper_files = [f for f in os.listdir(whisper_folder) if f.endswith(".txt")]
     for whisper_file in whisper_files:
         # Find the base filename (e.g., "TUEPM30" from "TUEPM30_2025-08-05_16-07-37.txt")
         match = re.match(r"(.+)_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}\.txt$", whisper_file)
@@ -84,10 +83,10 @@ def batch_process_files():
             continue # skip files that don't match expected pattern
         base_name = match.group(1)
         cleaned_file = base_name + ".txt"
-        whisper_path = os.path.join(WHISPER_FOLDER, whisper_file)
-        cleaned_path = os.path.join(CLEANED_FOLDER, cleaned_file)
+        whisper_path = os.path.join(whisper_folder, whisper_file)
+        cleaned_path = os.path.join(cleaned_folder, cleaned_file)
         output_file = base_name + "_Comparison.txt"
-        output_path = os.path.join(OUTPUT_FOLDER, output_file)
+        output_path = os.path.join(output_folder, output_file)
         
          # Skip if output already exists
         if os.path.exists(output_path):
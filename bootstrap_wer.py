@@ -0,0 +1,285 @@
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from levenshtein_WER import extract_blocks, levenshtein_distance, tokenize
+from paths import WER_FOLDER
+
+N_REPLICATES = 10000
+CONFIDENCE = 0.95
+CHUNK_SIZE = 1000  # replicates drawn per index matrix
+PARALLEL_THRESHOLD = 20000  # below this, process start-up costs more than it saves
+
+
+def event_counts(comparison_filepath):
+    """
+    Returns (event key, word errors, reference words) for every event of one
+    comparison file. The key is the stage label plus its occurrence number,
+    so events can be lined up across model versions.
+    """
+    counts = []
+    seen = {}
+    for blk in extract_blocks(comparison_filepath):
+        stage = blk.get('stage', 'UNKNOWN')
+        seen[stage] = seen.get(stage, 0) + 1
+        cleaned = blk.get('cleaned', '')
+        counts.append(((stage, seen[stage]), levenshtein_distance(cleaned, blk.get('whisper', '')),
+                       len(tokenize(cleaned))))
+    return counts
+
+
+def session_event_counts(comparison_filepath):
+    """
+    Returns per-event word error counts and reference word counts for one
+    comparison file, as two integer arrays.
+    """
+    counts = event_counts(comparison_filepath)
+    return (np.array([errors for _, errors, _ in counts], dtype=np.int64),
+            np.array([ref_words for _, _, ref_words in counts], dtype=np.int64))
+
+
+def comparison_files(folder):
+    return {filename.replace("_Comparison.txt", ""): os.path.join(folder, filename)
+            for filename in sorted(os.listdir(folder)) if filename.endswith("_Comparison.txt")}
+
+
+def load_session_counts(folder):
+    """Reads every *_Comparison.txt file in a folder: session -> (errors, ref_words)."""
+    sessions = {}
+    for session, filepath in comparison_files(folder).items():
+        errors, ref_words = session_event_counts(filepath)
+        if len(errors):
+            sessions[session] = (errors, ref_words)
+    return sessions
+
+
+def load_paired_counts(folder_a, folder_b):
+    """
+    Reads two comparison folders of the same sessions (e.g. two model
+    versions) and lines their events up by session and event key. Sessions
+    or events found in only one folder are reported and left out.
+    Returns two session dicts with identical keys and event order.
+    """
+    files_a, files_b = comparison_files(folder_a), comparison_files(folder_b)
+    unmatched = sorted(set(files_a) ^ set(files_b))
+    if unmatched:
+        print(f"Warning: {len(unmatched)} session(s) not in both folders, left out: {', '.join(unmatched)}")
+    sessions_a, sessions_b = {}, {}
+    for session in sorted(set(files_a) & set(files_b)):
+        counts_a = {key: (errors, ref_words) for key, errors, ref_words in event_counts(files_a[session])}
+        counts_b = {key: (errors, ref_words) for key, errors, ref_words in event_counts(files_b[session])}
+        keys = [key for key in counts_a if key in counts_b]
+        if len(keys) < max(len(counts_a), len(counts_b)):
+            print(f"Warning: {session} has events in only one folder, left out: "
+                  f"{', '.join(f'{stage} #{n}' for stage, n in sorted(set(counts_a) ^ set(counts_b)))}")
+        if not keys:
+            continue
+        sessions_a[session] = tuple(np.array([counts_a[key][i] for key in keys], dtype=np.int64) for i in (0, 1))
+        sessions_b[session] = tuple(np.array([counts_b[key][i] for key in keys], dtype=np.int64) for i in (0, 1))
+    return sessions_a, sessions_b
+
+
+def load_conditions(csv_path):
+    """Reads a CSV with 'session' and 'condition' columns: session -> condition."""
+    with open(csv_path, newline='', encoding='utf8') as f:
+        return {row['session'].strip(): row['condition'].strip() for row in csv.DictReader(f)}
+
+
+def corpus_wer(sessions):
+    """Corpus WER: total word errors over total reference words, across all events."""
+    errors = sum(int(e.sum()) for e, _ in sessions.values())
+    ref_words = sum(int(r.sum()) for _, r in sessions.values())
+    return errors / ref_words if ref_words else float('nan')
+
+
+def pack_sessions(groups):
+    """
+    Lays ragged per-session event counts out as zero-padded (sessions x events)
+    matrices so replicates can be drawn with fancy indexing. Several groups
+    may be packed together if they hold the same sessions and events in the
+    same order, as paired data does; they then share every drawn index.
+    Returns ([errors, ref_words] for each group, events per session).
+    """
+    n_events = np.array([len(e) for e, _ in groups[0].values()], dtype=np.int64)
+    matrices = []
+    for sessions in groups:
+        errors = np.zeros((len(n_events), n_events.max()), dtype=np.int64)
+        ref_words = np.zeros_like(errors)
+        for i, (e, r) in enumerate(sessions.values()):
+            errors[i, :len(e)] = e
+            ref_words[i, :len(r)] = r
+        matrices.extend([errors, ref_words])
+    return matrices, n_events
+
+
+def draw_replicates(packed, n_replicates, seed):
+    """
+    Two-stage bootstrap: resample sessions with replacement, then resample
+    events within each drawn session. All replicates in the chunk are drawn as
+    one (replicates x sessions x events) index array, and the same indices
+    are applied to every packed matrix.
+    Returns the replicate sums of each matrix.
+    """
+    matrices, n_events = packed
+    n_sessions, max_events = matrices[0].shape
+    rng = np.random.default_rng(seed)
+    session_idx = rng.integers(0, n_sessions, size=(n_replicates, n_sessions))
+    drawn_n = n_events[session_idx][..., None]
+    event_idx = (rng.random((n_replicates, n_sessions, max_events)) * drawn_n).astype(np.int64)
+    # A drawn session contributes as many events as it really has
+    mask = np.arange(max_events) < drawn_n
+    rows = session_idx[..., None]
+    return [np.where(mask, matrix[rows, event_idx], 0).sum(axis=(1, 2)) for matrix in matrices]
+
+
+def _draw_chunk(args):
+    return draw_replicates(*args)
+
+
+def bootstrap_sums(groups, n_replicates=N_REPLICATES, seed=0, workers=None):
+    """
+    Draws `n_replicates` corpus-level replicates in chunks. Each chunk gets its
+    own child seed, so results are identical whether or not chunks run in
+    parallel. `groups` is a list of aligned session dicts that share every
+    drawn index (one dict for a single group, two for paired data).
+    Returns (word error sums, reference word sums) for each group.
+    """
+    packed = pack_sessions(groups)
+    sizes = [CHUNK_SIZE] * (n_replicates // CHUNK_SIZE)
+    if n_replicates % CHUNK_SIZE:
+        sizes.append(n_replicates % CHUNK_SIZE)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(sizes))
+    jobs = [(packed, size, child) for size, child in zip(sizes, seeds)]
+    if workers != 1 and n_replicates >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_draw_chunk, jobs))
+    else:
+        chunks = [_draw_chunk(job) for job in jobs]
+    sums = [np.concatenate(column) for column in zip(*chunks)]
+    return [(sums[i], sums[i + 1]) for i in range(0, len(sums), 2)]
+
+
+def percentile_interval(replicates, confidence=CONFIDENCE):
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(replicates, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def bootstrap_corpus_wer(sessions, n_replicates=N_REPLICATES, confidence=CONFIDENCE, seed=0, workers=None):
+    """Point estimate and percentile bootstrap interval for corpus WER."""
+    [(err_sums, ref_sums)] = bootstrap_sums([sessions], n_replicates, seed, workers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        replicates = err_sums / ref_sums
+    ci_low, ci_high = percentile_interval(replicates, confidence)
+    return {
+        "wer": corpus_wer(sessions),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "session_count": len(sessions),
+        "event_count": sum(len(e) for e, _ in sessions.values()),
+    }
+
+
+def bootstrap_wer_difference(sessions_a, sessions_b, n_replicates=N_REPLICATES, confidence=CONFIDENCE,
+                             seed=0, workers=None, paired=False):
+    """
+    Corpus WER of group A minus group B. Between-subject groups (conditions)
+    are resampled independently. With `paired=True` the groups must hold the
+    same sessions and events in the same order (see load_paired_counts), and
+    each replicate applies one set of drawn indices to both, so the interval
+    reflects the per-event differences rather than the spread between
+    sessions. `p_value` is the two-sided share of replicates whose difference
+    falls on the other side of zero.
+    """
+    if paired:
+        if list(sessions_a) != list(sessions_b) or any(
+                len(sessions_a[s][0]) != len(sessions_b[s][0]) for s in sessions_a):
+            raise ValueError("Paired comparison needs the same sessions and events in both groups")
+        (err_a, ref_a), (err_b, ref_b) = bootstrap_sums([sessions_a, sessions_b], n_replicates, seed, workers)
+    else:
+        seed_a, seed_b = np.random.SeedSequence(seed).spawn(2)
+        [(err_a, ref_a)] = bootstrap_sums([sessions_a], n_replicates, seed_a, workers)
+        [(err_b, ref_b)] = bootstrap_sums([sessions_b], n_replicates, seed_b, workers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        replicates = err_a / ref_a - err_b / ref_b
+    ci_low, ci_high = percentile_interval(replicates, confidence)
+    p_value = 2 * min(np.nanmean(replicates <= 0), np.nanmean(replicates >= 0))
+    return {
+        "difference": corpus_wer(sessions_a) - corpus_wer(sessions_b),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "p_value": float(min(p_value, 1.0)),
+    }
+
+
+def split_by_condition(sessions, conditions):
+    groups = {}
+    for session, counts in sessions.items():
+        condition = conditions.get(session)
+        if condition is None:
+            print(f"Skipped {session}, no condition recorded")
+            continue
+        groups.setdefault(condition, {})[session] = counts
+    return groups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals for corpus WER.")
+    parser.add_argument("folder", nargs="?", default=WER_FOLDER, help="Folder of *_Comparison.txt files.")
+    parser.add_argument("--conditions", default=None,
+                        help="CSV with 'session' and 'condition' columns, to compare conditions.")
+    parser.add_argument("--compare", default=None,
+                        help="Second comparison folder (e.g. another model version) to compare against.")
+    parser.add_argument("--replicates", default=N_REPLICATES, help="Number of bootstrap replicates.", type=int)
+    parser.add_argument("--confidence", default=CONFIDENCE, help="Interval coverage.", type=float)
+    parser.add_argument("--seed", default=0, help="Random seed.", type=int)
+    parser.add_argument("--workers", default=None, help="Worker processes for large replicate counts.", type=int)
+    args = parser.parse_args(argv)
+
+    sessions = load_session_counts(args.folder)
+    if not sessions:
+        print(f"No comparison files found in {args.folder}")
+        return
+    options = dict(n_replicates=args.replicates, confidence=args.confidence, seed=args.seed, workers=args.workers)
+
+    pct = int(args.confidence * 100)
+
+    def print_interval(label, group):
+        result = bootstrap_corpus_wer(group, **options)
+        print(f"{label}: WER = {result['wer']:.3f} [{pct}% CI {result['ci_low']:.3f}, {result['ci_high']:.3f}] "
+              f"({result['session_count']} sessions, {result['event_count']} events)")
+
+    def print_difference(label_a, label_b, group_a, group_b, paired):
+        result = bootstrap_wer_difference(group_a, group_b, paired=paired, **options)
+        kind = "paired" if paired else "independent groups"
+        print(f"{label_a} - {label_b} ({kind}): {result['difference']:+.3f} "
+              f"[{pct}% CI {result['ci_low']:+.3f}, {result['ci_high']:+.3f}], p = {result['p_value']:.4f}")
+
+    print_interval("All sessions", sessions)
+
+    # Conditions are different children, so their groups are resampled independently
+    if args.conditions:
+        groups = split_by_condition(sessions, load_conditions(args.conditions))
+        for label, group in groups.items():
+            print_interval(label, group)
+        labels = list(groups)
+        for i, label_a in enumerate(labels):
+            for label_b in labels[i + 1:]:
+                print_difference(label_a, label_b, groups[label_a], groups[label_b], paired=False)
+
+    # Another model version transcribed the same sessions, so the comparison is paired
+    if args.compare:
+        sessions_a, sessions_b = load_paired_counts(args.folder, args.compare)
+        if not sessions_a:
+            print(f"No sessions in common between {args.folder} and {args.compare}")
+            return
+        print_interval("Comparison folder", load_session_counts(args.compare))
+        print_difference("Main folder", "Comparison folder", sessions_a, sessions_b, paired=True)
+
+if __name__ == "__main__":
+    main()
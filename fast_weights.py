@@ -0,0 +1,89 @@
+import argparse
+import os
+
+WEIGHTS_FOLDER = os.path.join(os.path.expanduser("~"), ".cache", "mres_weights")
+MODEL_NAMES = ["tiny", "base", "small", "medium", "large",
+               "tiny.en", "base.en", "small.en", "medium.en"]
+
+
+def converted_path(name, weights_folder=WEIGHTS_FOLDER):
+    return os.path.join(weights_folder, f"{name}.mmap.pt")
+
+
+def convert_model(name, weights_folder=WEIGHTS_FOLDER):
+    """
+    One-time conversion of a Whisper checkpoint into a file that can be
+    memory-mapped: float32 contiguous tensors in torch's zip format, so loading
+    needs no dtype conversion or copy.
+    """
+    import torch
+    import whisper
+
+    model = whisper.load_model(name, device="cpu")
+    alignment_heads = whisper._ALIGNMENT_HEADS.get(name)
+    checkpoint = {
+        "dims": vars(model.dims),
+        "model_state_dict": {key: value.float().contiguous() for key, value in model.state_dict().items()},
+        "alignment_heads": alignment_heads.decode("ascii") if alignment_heads else None,
+    }
+    os.makedirs(weights_folder, exist_ok=True)
+    path = converted_path(name, weights_folder)
+    # Write to a temporary name first so a running loader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_model(name, device=None, weights_folder=WEIGHTS_FOLDER):
+    """
+    Loads a Whisper model from its converted file if there is one, falling back
+    to whisper.load_model otherwise. The weights stay memory-mapped: pages are
+    read in lazily on first use, and processes loading the same model on one
+    machine share them through the page cache.
+    """
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    path = converted_path(name, weights_folder)
+    if not os.path.exists(path):
+        return whisper.load_model(name, device=device)
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+    # Build the module without allocating weights, then point its parameters at the mapped tensors
+    with torch.device("meta"):
+        model = Whisper(dims)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    # Buffers that are not saved in the state dict have to be rebuilt
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2:] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    if checkpoint["alignment_heads"]:
+        model.set_alignment_heads(checkpoint["alignment_heads"].encode("ascii"))
+
+    for key, tensor in list(model.named_parameters()) + list(model.named_buffers()):
+        if tensor.is_meta:
+            raise RuntimeError(f"{path} has no weights for {key}; convert the model again")
+    return model.to(device)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Whisper models to memory-mappable weights.")
+    parser.add_argument("models", nargs="+", choices=MODEL_NAMES, help="Models to convert.")
+    parser.add_argument("--weights_folder", default=WEIGHTS_FOLDER, help="Where converted weights are kept.")
+    args = parser.parse_args(argv)
+    for name in args.models:
+        print(f"Converting {name}...")
+        print(f"Saved {convert_model(name, args.weights_folder)}")
+
+
+if __name__ == "__main__":
+    main()
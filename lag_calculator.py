@@ -1,47 +1,25 @@
-import re
 import statistics
+import sys
 from datetime import timedelta
 
-def parse_timecode(tc):
-    # Accepts MM:SS or HH:MM:SS and returns total seconds
-    parts = tc.split(":")
-    if len(parts) == 2:
-        return timedelta(minutes=int(parts[0]), seconds=int(parts[1]))
-    elif len(parts) == 3:
-        return timedelta(hours=int(parts[0]), minutes=int(parts[1]), seconds=int(parts[2]))
-    else:
-        return timedelta(0)
+from batch_utterances_miner import natural_event_sort_key
+from turn_index import TurnIndex, corpus_query, gap_distribution
 
 def extract_lag_times(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        transcript = f.read()
-
-    # Only keeps text before the RECALL AND FEEDBACK
-    split_marker = "RECALL AND FEEDBACK"
-    transcript = transcript.split(split_marker)[0]
-
-    entry_pattern = re.compile(r'([A-Za-z_]+) \[(\d{2}:\d{2})-(\d{2}:\d{2})\]: ([^\n]*)', re.IGNORECASE)
-
-    entries = []
-    for match in entry_pattern.finditer(transcript):
-        speaker, start, end, text = match.groups()
-        speaker_norm = speaker.strip().upper()
-        if speaker_norm in ['PEPPER', 'CHILD']:
-            entries.append({
-                'speaker': speaker_norm,
-                'start': parse_timecode(start),
-                'end': parse_timecode(end),
-                'text': text.strip()
-            })
-
-# Usage:
-# lag_results = extract_lag_times("/mnt/c/Users/olutu/Downloads/cleaned_transcriptions/FRIAM07.txt")
-# for lag in lag_results:
-#     print(lag)
-
-# Separate lag times
-pepper_to_child_lags = [entry['lag_seconds'] for entry in lag_results if entry['type'] == 'Pepper to Child']
-child_to_pepper_lags = [entry['lag_seconds'] for entry in lag_results if entry['type'] == 'Child to Pepper']
+    # Turns after the RECALL AND FEEDBACK marker are left out by parse_turns
+    index = TurnIndex.from_file(filepath)
+
+    # Lag between consecutive turns whenever the speaker changes
+    gaps = index.gaps()
+    lag_results = []
+    for first, second, lag_type, gap in zip(gaps['first'], gaps['second'], gaps['type'], gaps['gap_seconds']):
+        lag_results.append({
+            'type': lag_type,
+            'from_end': timedelta(seconds=index.ends[first]),
+            'to_start': timedelta(seconds=index.starts[second]),
+            'lag_seconds': float(gap)
+        })
+    return lag_results
 
 def print_stats(label, lag_list):
     if lag_list:
@@ -55,5 +33,27 @@ def print_stats(label, lag_list):
     else:
         print(f"{label}: No entries\n")
 
-print_stats("Pepper to Child", pepper_to_child_lags)
-print_stats("Child to Pepper", child_to_pepper_lags)
+def main(filepaths):
+    corpus = {filepath: TurnIndex.from_file(filepath) for filepath in filepaths}
+
+    # Separate lag times
+    lags_by_type = gap_distribution(corpus)
+    print_stats("Pepper to Child", list(lags_by_type.get('Pepper to Child', [])))
+    print_stats("Child to Pepper", list(lags_by_type.get('Child to Pepper', [])))
+
+    overlaps = corpus_query(corpus, "overlaps")
+    child_interruptions = corpus_query(corpus, "interruptions", by_speaker="CHILD")
+    pepper_interruptions = corpus_query(corpus, "interruptions", by_speaker="PEPPER")
+    print(f"Overlapping turns: {len(overlaps.get('first', []))}")
+    print(f"  Child interrupting Pepper: {len(child_interruptions.get('first', []))}")
+    print(f"  Pepper interrupting Child: {len(pepper_interruptions.get('first', []))}\n")
+
+    latencies = corpus_query(corpus, "response_latencies", from_speaker="PEPPER", to_speaker="CHILD")
+    for event in sorted(set(latencies.get('event', [])), key=natural_event_sort_key):
+        print_stats(f"Child response latency ({event})",
+                    list(latencies['latency_seconds'][latencies['event'] == event]))
+
+# Usage:
+# python lag_calculator.py /mnt/c/Users/olutu/Downloads/cleaned_transcriptions/FRIAM07.txt
+if __name__ == "__main__":
+    main(sys.argv[1:])
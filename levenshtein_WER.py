@@ -1,7 +1,6 @@
 import os
 import re
 import math
-from jiwer import wer
 
 def tokenize(s):
     return re.findall(r"\w+", s)
@@ -45,6 +44,8 @@ def extract_blocks(filepath):
     return blocks
 
 def compute_session_metrics(comparison_filepath):
+    # jiwer is only needed here, so the tokenizer and distance stay cheap to import
+    from jiwer import wer
     blocks = extract_blocks(comparison_filepath)
     lev_distances = []
     wer_vals = []
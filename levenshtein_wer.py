@@ -1,5 +1,4 @@
 import re
-from jiwer import wer
 from difflib import SequenceMatcher
 
 def tokenize(s):
@@ -49,6 +48,7 @@ def extract_blocks(filepath):
     return blocks
 
 def compute_metrics_for_file(filepath):
+    from jiwer import wer
     blocks = extract_blocks(filepath)
     result = []
     for blk in blocks:
@@ -0,0 +1,120 @@
+"""
+Single entry point for the transcription and analysis scripts.
+
+Only argparse is imported up front; each subcommand imports the modules it
+needs when it runs, so `--help` and the text-only tools start quickly and
+nothing here loads a Whisper model unless a transcription command asks for it.
+
+    python mres.py --data_dir /path/to/Downloads score
+    python mres.py live --model small
+"""
+import argparse
+import os
+import sys
+
+
+def run_mine(args):
+    import paths
+    from batch_utterances_miner import batch_process_files
+    batch_process_files(args.whisper_folder or paths.WHISPER_FOLDER,
+                        args.cleaned_folder or paths.CLEANED_FOLDER,
+                        args.output_folder or paths.WER_FOLDER)
+
+
+def run_score(args):
+    import paths
+    from levenshtein_WER import compute_session_metrics
+    folder = args.folder or paths.WER_FOLDER
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith("_Comparison.txt"):
+            continue
+        metrics = compute_session_metrics(os.path.join(folder, filename))
+        if metrics is None:
+            continue
+        print(f"{filename.replace('_Comparison.txt', '')}: "
+              f"WER={metrics['average_wer']:.3f}, "
+              f"Levenshtein avg={metrics['average_levenshtein']:.2f} "
+              f"median={metrics['median_levenshtein']} "
+              f"({metrics['event_count']} events)")
+
+
+def run_lags(args):
+    import paths
+    import lag_calculator
+    filepaths = args.files
+    if not filepaths:
+        filepaths = [os.path.join(paths.CLEANED_FOLDER, f)
+                     for f in sorted(os.listdir(paths.CLEANED_FOLDER)) if f.endswith(".txt")]
+    lag_calculator.main(filepaths)
+
+
+def run_stats(args):
+    import paths
+    from shapiro_normalcy import run_shapiro
+    run_shapiro(args.xlsx or paths.INTERACTIONS_FILE, args.sheet)
+
+
+def forward(module_name):
+    """Hands the remaining arguments to a script that has its own argument parser."""
+    def run(args):
+        import importlib
+        importlib.import_module(module_name).main(args.rest)
+    return run
+
+
+FORWARDED = {
+    "bootstrap": ("bootstrap_wer", "Bootstrap confidence intervals for corpus WER."),
+    "live": ("transcribe_demo", "Live microphone transcription."),
+    "transcribe": ("segment_transcriber", "Batch-transcribe the CHILD turns of recorded sessions."),
+    "serve": ("whisper_server", "Run the shared Whisper model server."),
+    "cache": ("audio_cache", "Pre-decode session recordings into the audio cache."),
+    "convert": ("fast_weights", "Convert Whisper models to memory-mappable weights."),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mres", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data_dir", default=None,
+                        help="Root folder of the study data (default: $MRES_DATA_DIR or the Downloads folder).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    mine = subparsers.add_parser("mine", help="Build per-event comparison files from transcripts.")
+    mine.add_argument("--whisper_folder", default=None, help="Folder of Whisper transcripts.")
+    mine.add_argument("--cleaned_folder", default=None, help="Folder of cleaned transcripts.")
+    mine.add_argument("--output_folder", default=None, help="Where comparison files are written.")
+    mine.set_defaults(func=run_mine)
+
+    score = subparsers.add_parser("score", help="Per-session WER and Levenshtein metrics.")
+    score.add_argument("folder", nargs="?", default=None, help="Folder of *_Comparison.txt files.")
+    score.set_defaults(func=run_score)
+
+    lags = subparsers.add_parser("lags", help="Pepper/child response lag statistics.")
+    lags.add_argument("files", nargs="*", help="Cleaned transcripts (default: every file in the cleaned folder).")
+    lags.set_defaults(func=run_lags)
+
+    stats = subparsers.add_parser("stats", help="Shapiro-Wilk normality tests on the interaction record.")
+    stats.add_argument("--xlsx", default=None, help="Interaction record spreadsheet.")
+    stats.add_argument("--sheet", default="Sheet2", help="Sheet to read.")
+    stats.set_defaults(func=run_stats)
+
+    for name, (module_name, help_text) in FORWARDED.items():
+        sub = subparsers.add_parser(name, help=f"{help_text} Run '{name} --help' for its options.",
+                                    add_help=False)
+        sub.set_defaults(func=forward(module_name))
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in FORWARDED:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.rest = rest
+    if args.data_dir:
+        # paths.py reads this when it is first imported by a subcommand
+        os.environ["MRES_DATA_DIR"] = args.data_dir
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,11 @@
+import os
+
+# Root of the study data; override with the MRES_DATA_DIR environment variable
+DATA_DIR = os.environ.get("MRES_DATA_DIR", "/mnt/c/Documents and Settings/olutu/Downloads")
+
+WHISPER_FOLDER = os.path.join(DATA_DIR, "whisper_transcriptions")
+CLEANED_FOLDER = os.path.join(DATA_DIR, "cleaned_transcriptions")
+WER_FOLDER = os.path.join(DATA_DIR, "wer_processing_transcriptions")
+SEGMENT_FOLDER = os.path.join(DATA_DIR, "whisper_segment_transcriptions")
+AUDIO_FOLDER = os.path.join(DATA_DIR, "session_recordings")
+INTERACTIONS_FILE = os.path.join(DATA_DIR, "record_of_interactions.xlsx")
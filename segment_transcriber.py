@@ -0,0 +1,166 @@
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from audio_cache import AUDIO_EXTENSIONS, SAMPLE_RATE, load_cached_audio
+from batch_utterances_miner import natural_event_sort_key, normalize_event_label
+from paths import AUDIO_FOLDER, CLEANED_FOLDER
+from paths import SEGMENT_FOLDER as OUTPUT_FOLDER
+from turn_index import parse_timestamp
+from whisper_server import WhisperClient, decode_batch
+
+PADDING = 0.25  # seconds of context kept either side of each turn
+BATCH_SIZE = 16
+
+
+def extract_child_spans(text):
+    """
+    Extracts the timed CHILD turns from a manually cleaned transcript.
+    Returns a list of dicts with the normalized event label, the original
+    timestamp label and start/end in seconds, plus the number of CHILD turns
+    that could not be used.
+    Whole-second stamps are rounded down, so such an end stamp is treated as
+    inclusive: a turn stamped [01:02-01:02] covers 01:02 up to 01:03.
+    """
+    spans = []
+    skipped = 0
+    current_event = None
+    for line in text.splitlines():
+        event_header = re.match(r"^(PICTURE \d+|STAGE 2|STAGE B|SHOWING PICTURE \d+)", line, re.IGNORECASE)
+        if event_header:
+            current_event = normalize_event_label(event_header.group(1))
+            continue
+        if not line.startswith("CHILD ["):
+            continue
+        child_turn = re.match(r"^CHILD \[([\d:.]+)-([\d:.]+)\]:", line)
+        if not child_turn or not current_event:
+            skipped += 1
+            continue
+        try:
+            start, end = parse_timestamp(child_turn.group(1)), parse_timestamp(child_turn.group(2))
+        except ValueError:
+            skipped += 1
+            continue
+        if "." not in child_turn.group(2):
+            end += 1
+        if end <= start:
+            skipped += 1
+            continue
+        spans.append({"event": current_event, "stamp": f"{child_turn.group(1)}-{child_turn.group(2)}",
+                      "start": start, "end": end})
+    return spans, skipped
+
+
+def slice_segments(audio, spans, padding=PADDING, sample_rate=SAMPLE_RATE):
+    """Cuts each span, widened by `padding` seconds, out of the session audio."""
+    segments = []
+    for span in spans:
+        first = max(0, int((span["start"] - padding) * sample_rate))
+        last = min(len(audio), int((span["end"] + padding) * sample_rate))
+        segments.append(audio[first:last])
+    return segments
+
+
+def transcribe_segments(segments, model=None, client=None, batch_size=BATCH_SIZE, language="en"):
+    """
+    Transcribes the segments either with an in-process model, in batches of
+    `batch_size`, or through a running whisper_server. Requests to the server are
+    sent concurrently so that it can merge them into batches itself.
+    """
+    if client is not None:
+        with ThreadPoolExecutor(max_workers=batch_size) as pool:
+            results = pool.map(lambda segment: client.transcribe(segment, language=language), segments)
+            return [result["text"].strip() for result in results]
+
+    texts = []
+    for i in range(0, len(segments), batch_size):
+        batch = segments[i:i + batch_size]
+        texts.extend(result["text"].strip() for result in decode_batch(model, batch, language))
+    return texts
+
+
+def format_event_transcript(spans, texts):
+    """Writes results keyed by event, in the layout batch_utterances_miner reads."""
+    by_event = {}
+    for span, text in zip(spans, texts):
+        by_event.setdefault(span["event"], []).append((span, text))
+    output_lines = []
+    for event in sorted(by_event, key=natural_event_sort_key):
+        output_lines.append(f"EXP-EVENT: {event}")
+        for span, text in by_event[event]:
+            output_lines.append(f"CHILD-TRANSCRIPT: CHILD [{span['stamp']}]: {text}")
+        output_lines.append("")
+    return '\n'.join(output_lines)
+
+
+def find_session_audio(audio_folder, base_name):
+    for filename in sorted(os.listdir(audio_folder)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() in AUDIO_EXTENSIONS and (stem == base_name or stem.startswith(base_name + "_")):
+            return os.path.join(audio_folder, filename)
+    return None
+
+
+def batch_transcribe_sessions(cleaned_folder=CLEANED_FOLDER, audio_folder=AUDIO_FOLDER,
+                              output_folder=OUTPUT_FOLDER, model=None, client=None,
+                              padding=PADDING, batch_size=BATCH_SIZE):
+    os.makedirs(output_folder, exist_ok=True)
+    count = 0
+    for cleaned_file in sorted(os.listdir(cleaned_folder)):
+        if not cleaned_file.endswith(".txt"):
+            continue
+        base_name = cleaned_file[:-len(".txt")]
+        audio_path = find_session_audio(audio_folder, base_name)
+        if audio_path is None:
+            print(f"Skipped {cleaned_file}, no session recording found")
+            continue
+
+        with open(os.path.join(cleaned_folder, cleaned_file), "r", encoding="utf8") as f:
+            spans, skipped = extract_child_spans(f.read())
+        if skipped:
+            print(f"{cleaned_file}: skipped {skipped} CHILD turn(s) with missing or invalid timestamps or no event")
+        if not spans:
+            print(f"Skipped {cleaned_file}, no timed CHILD turns")
+            continue
+
+        audio = load_cached_audio(audio_path)
+        segments = slice_segments(audio, spans, padding)
+        texts = transcribe_segments(segments, model, client, batch_size)
+
+        # Timestamped name so batch_utterances_miner picks the file up as a Whisper transcript
+        output_file = f"{base_name}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
+        output_path = os.path.join(output_folder, output_file)
+        with open(output_path, "w", encoding="utf8") as fout:
+            fout.write(format_event_transcript(spans, texts))
+        child_seconds = sum(len(segment) for segment in segments) / SAMPLE_RATE
+        print(f"Saved {output_path} ({len(spans)} turns, {child_seconds:.0f} s of "
+              f"{len(audio) / SAMPLE_RATE:.0f} s transcribed)")
+        count += 1
+    print(f"Total sessions transcribed: {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe only the CHILD turns marked in cleaned transcripts.")
+    parser.add_argument("--cleaned_folder", default=CLEANED_FOLDER, help="Folder of cleaned transcripts.")
+    parser.add_argument("--audio_folder", default=AUDIO_FOLDER, help="Folder of session recordings.")
+    parser.add_argument("--output_folder", default=OUTPUT_FOLDER, help="Where per-event transcripts are written.")
+    parser.add_argument("--model", default="medium.en", help="Model to load when no server is given.")
+    parser.add_argument("--server", default=None, help="URL of a running whisper_server.")
+    parser.add_argument("--padding", default=PADDING, help="Seconds of padding around each turn.", type=float)
+    parser.add_argument("--batch_size", default=BATCH_SIZE, help="Segments per model call.", type=int)
+    args = parser.parse_args(argv)
+
+    model = client = None
+    if args.server:
+        client = WhisperClient(args.server)
+    else:
+        from fast_weights import load_model
+        model = load_model(args.model)
+    batch_transcribe_sessions(args.cleaned_folder, args.audio_folder, args.output_folder,
+                              model, client, args.padding, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from collections import deque
+from statistics import NormalDist
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_DURATION = 0.02  # seconds per analysis frame
+OPEN_SNR_DB = 6.0  # level above the noise floor needed to open the gate
+CLOSE_SNR_DB = 3.0  # the gate closes again only below this, so speech is not chopped up
+ONSET_DURATION = 0.06  # speech must stay above the open level this long, so clicks do not open the gate
+HANGOVER_DURATION = 0.3  # keep the gate open this long after the level drops, for word endings
+CALIBRATION_DURATION = 0.5  # audio used to seed the noise estimate; it is passed through undecided
+NOISE_WINDOW_DURATION = 5.0  # the noise estimate comes from the quieter frames of this window
+NOISE_UPDATE_DURATION = 0.1  # how often the noise estimate is recomputed
+# Speech may fill up to three quarters of the window before it lifts the estimate
+NOISE_QUANTILES = (0.1, 0.25)
+OPEN_SPREAD = 3.0  # in fluctuating noise, opening also needs this many standard deviations above the noise level
+CLOSE_SPREAD = 2.0
+MIN_LEVEL_DB = -100.0
+
+
+class SpeechGate:
+    """
+    Decides whether audio contains speech by comparing each frame's level with
+    an online estimate of the noise. The estimate is taken from the quieter
+    frames of the last few seconds, whether or not the gate was open: assuming
+    noise levels (in dB) are roughly normal, two low quantiles give both the
+    typical noise level and its spread. The gate opens only on frames well
+    above both, by the fixed SNR margin or by a few standard deviations when
+    the noise fluctuates more than that, as it does in a classroom. A lasting
+    rise in room noise moves the quantiles, and so closes the gate, within
+    the window. The first half second is passed through while the estimate
+    is seeded.
+
+    One gate is meant to live for a whole session: call `contains_speech` on
+    every chunk before it is sent to the model, and `report` at the end to see
+    how many model calls were avoided.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, open_snr_db=OPEN_SNR_DB, close_snr_db=CLOSE_SNR_DB,
+                 frame_duration=FRAME_DURATION, onset_duration=ONSET_DURATION,
+                 hangover_duration=HANGOVER_DURATION, calibration_duration=CALIBRATION_DURATION,
+                 noise_window_duration=NOISE_WINDOW_DURATION):
+        self.frame_length = int(sample_rate * frame_duration)
+        self.open_snr_db = open_snr_db
+        self.close_snr_db = close_snr_db
+        self.onset_frames = max(1, round(onset_duration / frame_duration))
+        self.hangover_frames = round(hangover_duration / frame_duration)
+        self.calibration_frames = max(1, round(calibration_duration / frame_duration))
+        self.update_frames = max(1, round(NOISE_UPDATE_DURATION / frame_duration))
+        self.recent_levels = deque(maxlen=max(self.calibration_frames, round(noise_window_duration / frame_duration)))
+        self.frames_seen = 0
+        self.noise_db = None
+        self.noise_spread = 0.0
+        self.is_open = False
+        self.onset_count = 0
+        self.hangover_left = 0
+        self.remainder = np.zeros(0, dtype=np.float32)
+        self.chunks_passed = 0
+        self.chunks_skipped = 0
+
+    def frame_levels(self, samples):
+        """
+        Returns the RMS level in dBFS of every complete frame. Samples that do
+        not fill a frame are carried over to the next call.
+        """
+        samples = np.asarray(samples).reshape(-1)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        samples = np.concatenate([self.remainder, samples.astype(np.float32)])
+        n_frames = len(samples) // self.frame_length
+        self.remainder = samples[n_frames * self.frame_length:]
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        return np.maximum(20 * np.log10(np.maximum(rms, 1e-10)), MIN_LEVEL_DB)
+
+    def _estimate_noise(self):
+        """Noise level and spread from two low quantiles of the recent frame levels."""
+        low, high = np.quantile(np.fromiter(self.recent_levels, dtype=np.float64), NOISE_QUANTILES)
+        z_low, z_high = (NormalDist().inv_cdf(q) for q in NOISE_QUANTILES)
+        self.noise_spread = float(high - low) / (z_high - z_low)
+        self.noise_db = float(high) - z_high * self.noise_spread
+
+    def update(self, samples):
+        """Feeds audio through the gate and returns a per-frame speech decision."""
+        levels = self.frame_levels(samples)
+        decisions = np.zeros(len(levels), dtype=bool)
+        for i, level in enumerate(levels):
+            self.recent_levels.append(level)
+            self.frames_seen += 1
+            if self.frames_seen < self.calibration_frames:
+                decisions[i] = True
+                continue
+            if self.frames_seen % self.update_frames == 0 or self.noise_db is None:
+                self._estimate_noise()
+            snr = level - self.noise_db
+            if self.is_open:
+                if snr >= max(self.close_snr_db, CLOSE_SPREAD * self.noise_spread):
+                    self.hangover_left = self.hangover_frames
+                elif self.hangover_left > 0:
+                    self.hangover_left -= 1
+                else:
+                    self.is_open = False
+            else:
+                open_snr_db = max(self.open_snr_db, OPEN_SPREAD * self.noise_spread)
+                self.onset_count = self.onset_count + 1 if snr >= open_snr_db else 0
+                if self.onset_count >= self.onset_frames:
+                    self.is_open = True
+                    self.onset_count = 0
+                    self.hangover_left = self.hangover_frames
+            decisions[i] = self.is_open
+        return decisions
+
+    def count(self, sent_to_model):
+        """Records whether a chunk was sent to the model or skipped."""
+        if sent_to_model:
+            self.chunks_passed += 1
+        else:
+            self.chunks_skipped += 1
+
+    def contains_speech(self, samples):
+        """Returns True if any frame of the chunk is speech, and counts the decision."""
+        speech = bool(self.update(samples).any())
+        self.count(speech)
+        return speech
+
+    @property
+    def calls_avoided(self):
+        return self.chunks_skipped
+
+    def report(self):
+        noise = f"{self.noise_db:.1f} dBFS" if self.noise_db is not None else "n/a"
+        return (f"[Gate] {self.chunks_passed} chunk(s) sent to the model, "
+                f"{self.calls_avoided} model call(s) avoided (noise floor {noise})")
@@ -1,33 +1,51 @@
-import sounddevice as sd
 import numpy as np
-import whisper
 import tempfile
 import os
-from scipy.io import wavfile
 import time
+from speech_gate import SpeechGate
+from whisper_server import WhisperClient
 
-# Initialize Whisper model
-print("Loading Whisper model...")
-model = whisper.load_model("base")
-print("Model loaded successfully!")
+# Use a running whisper_server if one is configured
+WHISPER_SERVER_URL = os.environ.get("WHISPER_SERVER_URL")
+MODEL_NAME = "base"
+model = None
 
 # Audio recording parameters
 SAMPLE_RATE = 16000
 CHANNELS = 1
-SILENCE_THRESHOLD = 0.01  # Adjust this value based on your microphone
 SILENCE_DURATION = 5  # seconds of silence to trigger pause
 CHUNK_DURATION = 0.1  # seconds per chunk
 
-def is_silence(audio_chunk, threshold=SILENCE_THRESHOLD):
-    """Check if the audio chunk is silence."""
-    return np.max(np.abs(audio_chunk)) < threshold
+# Adaptive speech gate, shared across recordings so it keeps tracking the room's noise floor
+gate = SpeechGate(SAMPLE_RATE)
+
+def get_model():
+    """Loads the Whisper model (or connects to the server) on first use."""
+    global model
+    if model is None:
+        if WHISPER_SERVER_URL:
+            model = WhisperClient(WHISPER_SERVER_URL)
+            print(f"Using Whisper server at {WHISPER_SERVER_URL}")
+        else:
+            from fast_weights import load_model
+            print("Loading Whisper model...")
+            model = load_model(MODEL_NAME)
+            print("Model loaded successfully!")
+    return model
+
+def is_silence(audio_chunk):
+    """Check if the audio chunk contains no speech according to the gate."""
+    return not gate.update(audio_chunk).any()
 
 def record_audio():
-    """Record audio until silence is detected."""
+    """Record audio until silence is detected. Returns an empty array if no speech was heard."""
+    import sounddevice as sd
     print("\nListening... (Speak now)")
     
     audio_chunks = []
     silence_counter = 0
+    checked = 0
+    heard_speech = False
     
     def audio_callback(indata, frames, time, status):
         if status:
@@ -38,31 +56,42 @@ def record_audio():
                        channels=CHANNELS,
                        samplerate=SAMPLE_RATE):
         while True:
-            if len(audio_chunks) > 0:
-                if is_silence(audio_chunks[-1]):
+            # Only feed the gate chunks it has not seen yet
+            if len(audio_chunks) > checked:
+                new_audio = np.concatenate(audio_chunks[checked:], axis=0)
+                checked = len(audio_chunks)
+                if is_silence(new_audio):
                     silence_counter += CHUNK_DURATION
                 else:
                     silence_counter = 0
+                    heard_speech = True
                 
                 if silence_counter >= SILENCE_DURATION:
                     break
             time.sleep(CHUNK_DURATION)
     
+    # Recordings with only background noise are not worth a model call
+    gate.count(heard_speech)
+    if not heard_speech:
+        print("No speech detected, skipping transcription")
+        return np.zeros((0, CHANNELS), dtype=np.float32)
     return np.concatenate(audio_chunks, axis=0)
 
 def save_audio_to_temp(audio_data):
     """Save audio data to a temporary WAV file."""
+    from scipy.io import wavfile
     temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
     wavfile.write(temp_file.name, SAMPLE_RATE, audio_data)
     return temp_file.name
 
 def transcribe_audio(audio_file):
     """Transcribe audio using Whisper."""
-    result = model.transcribe(audio_file)
+    result = get_model().transcribe(audio_file)
     return result["text"]
 
 def main():
     print("Speech-to-Text with Whisper")
+    get_model()
     print("Press Ctrl+C to exit")
     
     try:
@@ -87,6 +116,7 @@ def main():
             
     except KeyboardInterrupt:
         print("\nExiting...")
+        print(gate.report())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,104 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_FRAMES = 3000  # frames in one 30 s model window
+PAD = N_FFT // 2
+SILENCE_LOG_MEL = -10.0  # log10 of the 1e-10 floor, i.e. what zero padding turns into
+
+
+def load_mel_filters(n_mels=80):
+    """The model's own mel filterbank, as an (n_mels, N_FFT // 2 + 1) array."""
+    from whisper.audio import mel_filters
+    return mel_filters("cpu", n_mels).numpy()
+
+
+class StreamingLogMel:
+    """
+    Incremental version of whisper.log_mel_spectrogram for live audio.
+
+    `push` computes STFT and mel frames only for samples that have just
+    arrived and appends them to a rolling buffer of the last 30 s. `window`
+    then returns the (n_mels, 3000) input the encoder expects, matching what
+    whisper computes for the same phrase padded with silence: the few frames
+    at the open end are filled in against zero padding, and whisper's
+    max - 8 clipping and scaling are applied to the whole window.
+    """
+
+    def __init__(self, n_mels=80, filters=None, max_frames=N_FRAMES):
+        self.filters = load_mel_filters(n_mels) if filters is None else filters
+        self.max_frames = max_frames
+        # Periodic Hann window, as torch.hann_window uses
+        self.window_fn = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """Starts a new phrase."""
+        # Samples still needed for future frames, in reflect-padded coordinates
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0
+        self.started = False
+        self.next_frame = 0
+        self.frames = np.zeros((self.filters.shape[0], 0), dtype=np.float32)
+
+    def _log_mel(self, frames):
+        spectrum = np.fft.rfft(frames * self.window_fn, axis=-1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        return np.log10(np.maximum(self.filters @ power.T, 1e-10))
+
+    def _frames_from(self, samples, offset, first, count):
+        """Slices `count` analysis frames, starting at frame `first`, from padded samples."""
+        starts = first * HOP_LENGTH - offset + np.arange(count) * HOP_LENGTH
+        return samples[starts[:, None] + np.arange(N_FFT)]
+
+    def push(self, samples):
+        """Adds new 16 kHz float32 samples and returns how many frames were computed."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self.buffer = np.concatenate([self.buffer, samples])
+        if not self.started:
+            # The first frames reflect the start of the phrase, so wait until it is available
+            if len(self.buffer) <= PAD:
+                return 0
+            self.buffer = np.concatenate([self.buffer[1:PAD + 1][::-1], self.buffer])
+            self.started = True
+
+        available = self.buffer_offset + len(self.buffer)
+        count = max(0, (available - N_FFT) // HOP_LENGTH + 1 - self.next_frame)
+        if count:
+            frames = self._frames_from(self.buffer, self.buffer_offset, self.next_frame, count)
+            self.frames = np.concatenate([self.frames, self._log_mel(frames)], axis=1)[:, -self.max_frames:]
+            self.next_frame += count
+            # Drop samples no later frame will read
+            consumed = self.next_frame * HOP_LENGTH - self.buffer_offset
+            self.buffer = self.buffer[consumed:]
+            self.buffer_offset += consumed
+        return count
+
+    def _tail_frames(self):
+        """
+        Frames whose window reaches past the audio received so far, computed
+        against zero padding. Frames after these see only silence.
+        """
+        if not self.started:
+            # Too short to have been reflect-padded yet; whisper would reflect the zero-padded phrase
+            padded = np.concatenate([self.buffer, np.zeros(N_FFT + PAD, dtype=np.float32)])
+            padded = np.concatenate([padded[1:PAD + 1][::-1], padded])
+            count = -(-(len(self.buffer) + PAD) // HOP_LENGTH)
+            return self._log_mel(self._frames_from(padded, 0, 0, count))
+        audio_end = self.buffer_offset + len(self.buffer) - PAD
+        count = -(-(audio_end + PAD) // HOP_LENGTH) - self.next_frame
+        if count <= 0:
+            return self.frames[:, :0]
+        padded = np.concatenate([self.buffer, np.zeros(N_FFT, dtype=np.float32)])
+        return self._log_mel(self._frames_from(padded, self.buffer_offset, self.next_frame, count))
+
+    def window(self):
+        """The log-mel input for the model: (n_mels, max_frames), float32."""
+        log_spec = np.concatenate([self.frames, self._tail_frames()], axis=1)[:, -self.max_frames:]
+        n_mels, n_frames = log_spec.shape
+        if n_frames < self.max_frames:
+            silence = np.full((n_mels, self.max_frames - n_frames), SILENCE_LOG_MEL, dtype=np.float32)
+            log_spec = np.concatenate([log_spec, silence], axis=1)
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
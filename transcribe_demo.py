@@ -12,15 +12,23 @@ from queue import Queue
 from time import sleep
 from sys import platform
 
+from fast_weights import load_model
+from speech_gate import OPEN_SNR_DB, SpeechGate
+from streaming_mel import HOP_LENGTH, StreamingLogMel
+from whisper_server import WhisperClient, decode_with_fallback
 
-def main():
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", default="medium", help="Model to use",
                         choices=["tiny", "base", "small", "medium", "large"])
     parser.add_argument("--non_english", action='store_true',
                         help="Don't use the english model.")
-    parser.add_argument("--energy_threshold", default=1000,
-                        help="Energy level for mic to detect.", type=int)
+    parser.add_argument("--server", default=None,
+                        help="URL of a running whisper_server to use instead of loading a model.")
+    parser.add_argument("--gate_snr_db", default=OPEN_SNR_DB,
+                        help="How far above the tracked noise floor (in dB) audio must be "
+                             "before it is sent to the model.", type=float)
     parser.add_argument("--record_timeout", default=2,
                         help="How real time the recording is in seconds.", type=float)
     parser.add_argument("--phrase_timeout", default=3,
@@ -30,7 +38,7 @@ def main():
         parser.add_argument("--default_microphone", default='pulse',
                             help="Default microphone name for SpeechRecognition. "
                                  "Run this with 'list' to view available Microphones.", type=str)
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # The last time a recording was retrieved from the queue.
     phrase_time = None
@@ -40,9 +48,13 @@ def main():
     phrase_bytes = bytes()
     # We use SpeechRecognizer to record our audio because it has a nice feature where it can detect when speech ends.
     recorder = sr.Recognizer()
-    recorder.energy_threshold = args.energy_threshold
-    # Definitely do this, dynamic energy compensation lowers the energy threshold dramatically to a point where the SpeechRecognizer never stops recording.
+    # Let every chunk through and leave the speech decision to the SpeechGate below;
+    # recordings are still cut every record_timeout seconds by phrase_time_limit.
+    recorder.energy_threshold = 0
+    # Dynamic energy compensation would raise the threshold again and drop quiet speech before the gate sees it.
     recorder.dynamic_energy_threshold = False
+    # Adaptive gate that keeps noise-only chunks away from the model.
+    gate = SpeechGate(16000, open_snr_db=args.gate_snr_db)
 
     # Important for linux users.
     # Prevents permanent application hang and crash by using the wrong Microphone
@@ -61,20 +73,27 @@ def main():
     else:
         source = sr.Microphone(sample_rate=16000)
 
-    # Load / Download model
-    model = args.model
-    if args.model != "large" and not args.non_english:
-        model = model + ".en"
-    audio_model = whisper.load_model(model)
+    # Load / Download model, unless a shared model server is already running
+    # A local model is fed from a streaming log-mel frontend, so each update only
+    # computes features for the newly arrived audio.
+    frontend = None
+    if args.server:
+        audio_model = WhisperClient(args.server)
+    else:
+        model = args.model
+        if args.model != "large" and not args.non_english:
+            model = model + ".en"
+        audio_model = load_model(model)
+        frontend = StreamingLogMel(audio_model.dims.n_mels)
+        # English-only models have no language tokens, so decode() cannot detect the language
+        decode_options = whisper.DecodingOptions(language=None if audio_model.is_multilingual else "en",
+                                                 fp16=torch.cuda.is_available())
 
     record_timeout = args.record_timeout
     phrase_timeout = args.phrase_timeout
 
     transcription = ['']
 
-    with source:
-        recorder.adjust_for_ambient_noise(source)
-
     def record_callback(_, audio:sr.AudioData) -> None:
         """
         Threaded callback function to receive audio data when recordings finish.
@@ -102,6 +121,8 @@ def main():
                 # Clear the current working audio buffer to start over with the new data.
                 if phrase_time and now - phrase_time > timedelta(seconds=phrase_timeout):
                     phrase_bytes = bytes()
+                    if frontend is not None:
+                        frontend.reset()
                     phrase_complete = True
                 # This is the last time we received new audio data from the queue.
                 phrase_time = now
@@ -110,17 +131,41 @@ def main():
                 audio_data = b''.join(data_queue.queue)
                 data_queue.queue.clear()
 
+                # The frontend only keeps the last 30 s, so a longer phrase would lose its
+                # beginning when the line is overwritten. Keep that line and start a new one.
+                if frontend is not None and not phrase_complete and \
+                        (len(phrase_bytes) + len(audio_data)) // 2 > frontend.max_frames * HOP_LENGTH:
+                    phrase_bytes = bytes()
+                    frontend.reset()
+                    phrase_complete = True
+
                 # Add the new audio data to the accumulated data for this phrase
                 phrase_bytes += audio_data
 
                 # Convert in-ram buffer to something the model can use directly without needing a temp file.
                 # Convert data from 16 bit wide integers to floating point with a width of 32 bits.
                 # Clamp the audio stream frequency to a PCM wavelength compatible default of 32768hz max.
-                audio_np = np.frombuffer(phrase_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+                new_audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+                if frontend is not None:
+                    frontend.push(new_audio_np)
+
+                # Skip the model call if the new audio is only background noise.
+                if not gate.contains_speech(new_audio_np):
+                    print("[Audio] No speech detected, skipping transcription.")
+                    # Keep the line break so the next phrase does not overwrite the previous one.
+                    if phrase_complete and transcription[-1]:
+                        transcription.append('')
+                    continue
 
                 # Read the transcription.
-                result = audio_model.transcribe(audio_np, fp16=torch.cuda.is_available())
-                text = result['text'].strip()
+                if frontend is not None:
+                    mel = torch.from_numpy(frontend.window()).to(audio_model.device)
+                    text = decode_with_fallback(audio_model, mel, decode_options).text.strip()
+                else:
+                    # The server needs the audio itself, so send the whole phrase.
+                    audio_np = np.frombuffer(phrase_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+                    result = audio_model.transcribe(audio_np, fp16=torch.cuda.is_available())
+                    text = result['text'].strip()
 
                 # If we detected a pause between recordings, add a new item to our transcription.
                 # Otherwise edit the existing one.
@@ -144,6 +189,7 @@ def main():
     print("\n\nTranscription:")
     for line in transcription:
         print(line)
+    print(gate.report())
 
 
 if __name__ == "__main__":
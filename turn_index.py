@@ -0,0 +1,176 @@
+import os
+import re
+
+import numpy as np
+
+from batch_utterances_miner import normalize_event_label
+
+SPLIT_MARKER = "RECALL AND FEEDBACK"
+SPEAKERS = ("PEPPER", "CHILD")
+
+TURN_PATTERN = re.compile(r'([A-Za-z_]+) \[([\d:.]+)-([\d:.]+)\]: ?([^\n]*)', re.IGNORECASE)
+EVENT_PATTERN = re.compile(r"^(PICTURE \d+|STAGE 2|STAGE B|SHOWING PICTURE \d+)", re.IGNORECASE)
+
+
+def parse_timestamp(tc):
+    """Accepts MM:SS or HH:MM:SS (seconds may be fractional) and returns seconds as a float."""
+    seconds = 0.0
+    for part in tc.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_turns(text):
+    """
+    Extracts PEPPER/CHILD turns from a cleaned transcript, up to the RECALL AND
+    FEEDBACK marker. Each turn carries the PICTURE/STAGE event it falls under.
+    """
+    turns = []
+    current_event = ""
+    for line in text.split(SPLIT_MARKER)[0].splitlines():
+        event_header = EVENT_PATTERN.match(line)
+        if event_header:
+            current_event = normalize_event_label(event_header.group(1))
+            continue
+        match = TURN_PATTERN.search(line)
+        if match and match.group(1).upper() in SPEAKERS:
+            turns.append({
+                'speaker': match.group(1).upper(),
+                'start': parse_timestamp(match.group(2)),
+                'end': parse_timestamp(match.group(3)),
+                'event': current_event,
+                'text': match.group(4).strip()
+            })
+    return turns
+
+
+class TurnIndex:
+    """
+    Turn intervals of one session, held as arrays sorted by start time.
+    A running maximum of the end times lets time-range queries binary-search
+    even though end times are not sorted. Query results are dicts of
+    equal-length arrays, indexing into the sorted turns.
+    """
+
+    def __init__(self, turns):
+        turns = sorted(turns, key=lambda turn: (turn['start'], turn['end']))
+        self.starts = np.array([turn['start'] for turn in turns], dtype=np.float64)
+        self.ends = np.array([turn['end'] for turn in turns], dtype=np.float64)
+        self.speakers = np.array([turn['speaker'] for turn in turns], dtype=object)
+        self.events = np.array([turn['event'] for turn in turns], dtype=object)
+        self.texts = [turn['text'] for turn in turns]
+        self.max_end = np.maximum.accumulate(self.ends) if len(turns) else self.ends
+
+    @classmethod
+    def from_file(cls, filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            return cls(parse_turns(f.read()))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def turns_between(self, t0, t1):
+        """Indices of the turns that intersect the time range [t0, t1)."""
+        first = np.searchsorted(self.max_end, t0, side='right')
+        last = np.searchsorted(self.starts, t1, side='left')
+        candidates = np.arange(first, max(first, last))
+        return candidates[self.ends[candidates] > t0]
+
+    def overlaps(self):
+        """
+        Every pair of turns by different speakers whose intervals overlap.
+        Only turns starting before turn i ends can overlap it, and those form a
+        contiguous block after i in start order.
+        """
+        n = len(self)
+        block_end = np.searchsorted(self.starts, self.ends, side='left')
+        counts = np.maximum(block_end - np.arange(1, n + 1), 0)
+        first = np.repeat(np.arange(n), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + offsets
+        keep = self.speakers[first] != self.speakers[second]
+        first, second = first[keep], second[keep]
+        return {
+            'first': first,
+            'second': second,
+            'overlap_seconds': np.minimum(self.ends[first], self.ends[second]) - self.starts[second],
+        }
+
+    def interruptions(self, by_speaker=None):
+        """
+        Overlaps in which the second speaker starts while the first is already
+        talking, optionally only those made by `by_speaker`.
+        """
+        pairs = self.overlaps()
+        keep = self.starts[pairs['second']] > self.starts[pairs['first']]
+        if by_speaker is not None:
+            keep &= self.speakers[pairs['second']] == by_speaker
+        return {key: value[keep] for key, value in pairs.items()}
+
+    def response_latencies(self, from_speaker="PEPPER", to_speaker="CHILD"):
+        """
+        For each `to_speaker` turn, the time from the end of the most recent
+        `from_speaker` turn that started before it. Only the first reply to a
+        given turn is counted. Negative latencies are overlapping replies.
+        """
+        from_idx = np.flatnonzero(self.speakers == from_speaker)
+        to_idx = np.flatnonzero(self.speakers == to_speaker)
+        prompt = np.searchsorted(self.starts[from_idx], self.starts[to_idx], side='left') - 1
+        answered = prompt >= 0
+        prompt, to_idx = prompt[answered], to_idx[answered]
+        _, first_reply = np.unique(prompt, return_index=True)
+        prompt, to_idx = from_idx[prompt[first_reply]], to_idx[first_reply]
+        return {
+            'first': prompt,
+            'second': to_idx,
+            'event': self.events[prompt],
+            'latency_seconds': self.starts[to_idx] - self.ends[prompt],
+        }
+
+    def gaps(self):
+        """Gaps between consecutive turns where the speaker changes, as in lag_calculator."""
+        first = np.flatnonzero(self.speakers[:-1] != self.speakers[1:])
+        second = first + 1
+        transitions = np.array([f"{a.title()} to {b.title()}"
+                                for a, b in zip(self.speakers[first], self.speakers[second])], dtype=object)
+        return {
+            'first': first,
+            'second': second,
+            'type': transitions,
+            'gap_seconds': self.starts[second] - self.ends[first],
+        }
+
+
+def build_corpus_index(folder):
+    """Builds a TurnIndex for every cleaned transcript in a folder: session -> TurnIndex."""
+    return {
+        filename[:-len(".txt")]: TurnIndex.from_file(os.path.join(folder, filename))
+        for filename in sorted(os.listdir(folder)) if filename.endswith(".txt")
+    }
+
+
+def corpus_query(corpus, query, **kwargs):
+    """
+    Runs the same TurnIndex query on every session and concatenates the
+    results, adding a 'session' column.
+    e.g. corpus_query(corpus, "interruptions", by_speaker="CHILD")
+    """
+    columns = {}
+    for session, index in corpus.items():
+        result = getattr(index, query)(**kwargs)
+        if not isinstance(result, dict):
+            result = {'index': result}
+        size = len(next(iter(result.values())))
+        result['session'] = np.array([session] * size, dtype=object)
+        for key, value in result.items():
+            columns.setdefault(key, []).append(value)
+    return {key: np.concatenate(values) for key, values in columns.items()}
+
+
+def gap_distribution(corpus):
+    """Gap lengths across the corpus, grouped by transition type ('Pepper to Child', ...)."""
+    gaps = corpus_query(corpus, "gaps")
+    if not gaps:
+        return {}
+    return {transition: gaps['gap_seconds'][gaps['type'] == transition].astype(np.float64)
+            for transition in np.unique(gaps['type'])}
@@ -68,11 +68,12 @@ def natural_event_sort_key(event_label):
         return (1, event_label)
     return (2, event_label)
 
-def main():
+def main(whisper_transcript_file=WHISPER_TRANSCRIPT_FILE, cleaned_transcript_file=CLEANED_TRANSCRIPT_FILE,
+         output_comparison_file=OUTPUT_COMPARISON_FILE):
     # Read input files
-    with open(WHISPER_TRANSCRIPT_FILE, "r", encoding="utf8") as f:
+    with open(whisper_transcript_file, "r", encoding="utf8") as f:
         whisper_text = f.read()
-    with open(CLEANED_TRANSCRIPT_FILE, "r", encoding="utf8") as f:
+    with open(cleaned_transcript_file, "r", encoding="utf8") as f:
         cleaned_text = f.read()
 
     whisper_utterances_by_event = extract_whisper_event_utterances(whisper_text)
@@ -91,10 +92,10 @@ def main():
         output_lines.append(f"CHILD-TRANSCRIPT [Whisper]: {whisper_utterances}")
         output_lines.append("")
 
-    with open(OUTPUT_COMPARISON_FILE, "w", encoding="utf8") as fout:
+    with open(output_comparison_file, "w", encoding="utf8") as fout:
         fout.write('\n'.join(output_lines))
 
-    print(f"Comparison file saved as: {OUTPUT_COMPARISON_FILE}")
+    print(f"Comparison file saved as: {output_comparison_file}")
 
 if __name__ == "__main__":
     main()
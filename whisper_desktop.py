@@ -10,16 +10,20 @@ import requests
 import json
 import traceback
 
+from speech_gate import SpeechGate
+
 class WhisperTranscriber:
     def __init__(self, device="default", duration=5):
         self.device = device
         self.duration = duration  # seconds per chunk
+        # Tracks the room's noise floor across chunks
+        self.gate = SpeechGate(16000)
         self.api_key = os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise RuntimeError("Please set OPENAI_API_KEY in your environment")
 
     def check_audio_level(self, wav_file):
-        """Check if audio level is above threshold"""
+        """Check if the chunk contains speech according to the adaptive gate"""
         try:
             wf = wave.open(wav_file, 'rb')
             try:
@@ -40,14 +44,13 @@ class WhisperTranscriber:
                 # Convert to numpy array
                 audio_data = np.frombuffer(frames, dtype=dtype)
                 
-                # Calculate RMS (Root Mean Square) of the audio
-                rms = np.sqrt(np.mean(np.square(audio_data.astype(np.float32))))
-                
-                # Threshold for considering audio as valid speech
-                threshold = 500  # Adjust this value based on testing
+                # Mix down to mono for the gate
+                if n_channels > 1:
+                    audio_data = audio_data.reshape(-1, n_channels).mean(axis=1).astype(np.int16)
                 
-                print("[Audio] RMS level:", rms)
-                return rms > threshold
+                speech = self.gate.contains_speech(audio_data)
+                print("[Audio] Noise floor: %.1f dBFS, speech: %s" % (self.gate.noise_db, speech))
+                return speech
             finally:
                 wf.close()
                 
@@ -68,7 +71,7 @@ class WhisperTranscriber:
             
             # Check if audio level is significant
             if not self.check_audio_level(tmp_file):
-                print("[Audio] Audio level too low, skipping transcription")
+                print("[Audio] No speech detected, skipping transcription")
                 try:
                     os.remove(tmp_file)
                 except:
@@ -129,6 +132,7 @@ def main():
             time.sleep(0.1)
     except KeyboardInterrupt:
         print("\nExiting...")
+        print(transcriber.gate.report())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
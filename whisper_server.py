@@ -0,0 +1,269 @@
+import argparse
+import dataclasses
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+
+from audio_cache import decode_audio, load_cached_audio
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+SAMPLE_RATE = 16000
+MAX_BATCH_SIZE = 8
+BATCH_WAIT = 0.05  # seconds to wait for more requests before running a batch
+# Same fallback schedule and thresholds as whisper.transcribe
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def is_silence(result):
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def decode_with_fallback(model, mels, options):
+    """
+    Decodes a batch of log-mel windows the way whisper.transcribe decodes each
+    of its windows: windows whose result looks like a repetition loop or has
+    low confidence are decoded again at the next temperature, and windows the
+    model takes for silence get empty text instead of a hallucinated line.
+    Accepts one (n_mels, 3000) window or a batch and returns a result or a
+    list of results to match.
+    """
+    import whisper
+
+    single = mels.ndim == 2
+    if single:
+        mels = mels.unsqueeze(0)
+    results = [None] * len(mels)
+    pending = list(range(len(mels)))
+    for temperature in TEMPERATURES:
+        decoded = whisper.decode(model, mels[pending], dataclasses.replace(options, temperature=temperature))
+        retry = []
+        for i, result in zip(pending, decoded):
+            results[i] = result
+            if is_silence(result):
+                continue
+            if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+                retry.append(i)
+        pending = retry
+        if not pending:
+            break
+    results = [dataclasses.replace(result, text="") if is_silence(result) else result for result in results]
+    return results[0] if single else results
+
+
+def decode_batch(model, audios, language=None):
+    """
+    Transcribes a list of 16 kHz float32 clips with one resident model.
+    Clips that fit in a single 30 s window are decoded together in one batched
+    call, with the same temperature fallback and silence skipping as
+    model.transcribe; longer clips fall back to the regular sliding-window
+    transcribe. Returns a list of result dicts in the same order as the input.
+    """
+    import torch
+    import whisper
+
+    fp16 = torch.cuda.is_available()
+    if language is None and not model.is_multilingual:
+        # English-only models have no language tokens to detect with
+        language = "en"
+    results = [None] * len(audios)
+    short = [i for i, audio in enumerate(audios) if len(audio) <= whisper.audio.N_SAMPLES]
+    if short:
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(np.asarray(audios[i], dtype=np.float32)),
+                                        model.dims.n_mels)
+            for i in short
+        ]).to(model.device)
+        options = whisper.DecodingOptions(language=language, fp16=fp16, without_timestamps=True)
+        for i, decoded in zip(short, decode_with_fallback(model, mels, options)):
+            results[i] = {"text": decoded.text, "language": decoded.language}
+    for i, audio in enumerate(audios):
+        if results[i] is None:
+            result = model.transcribe(np.asarray(audio, dtype=np.float32), language=language, fp16=fp16)
+            results[i] = {"text": result["text"], "language": result["language"],
+                          "segments": result["segments"]}
+    return results
+
+
+class BatchingTranscriber:
+    """
+    Queues transcription jobs from many threads and runs them through the model
+    in batches. A batch is closed when it is full or when no new job arrives
+    within `batch_wait` seconds of the first one.
+    """
+
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait
+        self.jobs = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, audio, language=None):
+        """Blocks until the job has been transcribed and returns its result dict."""
+        job = {"audio": audio, "language": language, "done": threading.Event(),
+               "result": None, "error": None}
+        self.jobs.put(job)
+        job["done"].wait()
+        if job["error"] is not None:
+            raise job["error"]
+        return job["result"]
+
+    def _collect_batch(self):
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            # Decoding options must match within a single model call
+            by_language = {}
+            for job in batch:
+                by_language.setdefault(job["language"], []).append(job)
+            for language, jobs in by_language.items():
+                try:
+                    results = decode_batch(self.model, [job["audio"] for job in jobs], language)
+                    for job, result in zip(jobs, results):
+                        job["result"] = result
+                except Exception as e:
+                    for job in jobs:
+                        job["error"] = e
+                for job in jobs:
+                    job["done"].set()
+            print(f"[Server] Transcribed batch of {len(batch)} request(s)")
+
+
+def make_handler(transcriber, model_name):
+    class TranscriptionHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/health":
+                self._send_json(200, {"ok": True, "model": model_name})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/transcribe":
+                self._send_json(404, {"error": "not found"})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    # The server runs on the same machine, so clients may pass a file path.
+                    # Only session recordings ask for the decoded-audio cache; temporary
+                    # files would leave orphaned cache entries behind.
+                    payload = json.loads(body)
+                    if payload.get("cache"):
+                        audio = load_cached_audio(payload["path"])
+                    else:
+                        audio = decode_audio(payload["path"])
+                    language = payload.get("language")
+                else:
+                    audio = np.frombuffer(body, dtype=np.float32)
+                    language = parse_qs(url.query).get("language", [None])[0]
+            except Exception as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                self._send_json(200, transcriber.submit(audio, language))
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return TranscriptionHandler
+
+
+class WhisperClient:
+    """
+    Thin client for a running model server. `transcribe` accepts the same audio
+    inputs as `model.transcribe` (a file path or a 16 kHz float32 array) and
+    returns a dict with at least a "text" key, so scripts can use it in place of
+    an in-process model. Pass `cache=True` for session recordings that will be
+    transcribed again, so the server keeps their decoded audio.
+    """
+
+    def __init__(self, url=DEFAULT_URL, timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def transcribe(self, audio, language=None, cache=False, **kwargs):
+        # Decoding settings such as fp16 are chosen by the server
+        if isinstance(audio, str):
+            data = json.dumps({"path": os.path.abspath(audio), "language": language,
+                               "cache": cache}).encode("utf8")
+            req = urlrequest.Request(self.url + "/transcribe", data=data,
+                                     headers={"Content-Type": "application/json"})
+        else:
+            query = "?" + urlencode({"language": language}) if language else ""
+            data = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1).tobytes()
+            req = urlrequest.Request(self.url + "/transcribe" + query, data=data,
+                                     headers={"Content-Type": "application/octet-stream"})
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except HTTPError as e:
+            raise RuntimeError(f"Whisper server error: {json.loads(e.read()).get('error')}") from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve one resident Whisper model over localhost HTTP.")
+    parser.add_argument("--model", default="medium", help="Model to load",
+                        choices=["tiny", "base", "small", "medium", "large",
+                                 "tiny.en", "base.en", "small.en", "medium.en"])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to bind.")
+    parser.add_argument("--port", default=DEFAULT_PORT, help="Port to listen on.", type=int)
+    parser.add_argument("--max_batch_size", default=MAX_BATCH_SIZE,
+                        help="Largest number of requests merged into one model call.", type=int)
+    parser.add_argument("--batch_wait", default=BATCH_WAIT,
+                        help="Seconds to wait for more requests before running a batch.", type=float)
+    args = parser.parse_args(argv)
+
+    from fast_weights import load_model
+
+    print(f"Loading Whisper model '{args.model}'...")
+    model = load_model(args.model)
+    transcriber = BatchingTranscriber(model, args.max_batch_size, args.batch_wait)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(transcriber, args.model))
+    print(f"Serving on http://{args.host}:{args.port} (Ctrl+C to exit)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()